@@ -0,0 +1,392 @@
+"""
+Обработка изображений и создание видеоролика, без зависимости от графического интерфейса.
+"""
+import errno
+import heapq
+import io
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from PIL import Image
+import numpy as np
+
+# Поддерживаемые расширения изображений (в нижнем регистре)
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif'})
+
+# Количество потоков для параллельного просмотра папок
+SCAN_WORKERS = 8
+
+# Предварительное чтение файлов: количество потоков чтения и число файлов, читаемых наперед
+PREFETCH_WORKERS = 4
+PREFETCH_DEPTH = 8
+
+# Ориентировочный объем памяти под кадры при кодировании, байт
+FRAME_MEMORY_BUDGET = 1024 ** 3
+
+# Флаг CREATE_NO_WINDOW: на Windows ffmpeg запускается без окна консоли
+CREATE_NO_WINDOW = 0x08000000
+
+# Максимальная длина сообщения ffmpeg (последние символы stderr), показываемого при ошибке
+FFMPEG_ERROR_TAIL = 2000
+
+# Пресеты кодировщика libx264, доступные в интерфейсе (от быстрого к более компактному видео)
+PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow"]
+DEFAULT_PRESET = "ultrafast"
+
+# Минимальный интервал между вызовами функции прогресса, сек (~10 раз в секунду)
+PROGRESS_INTERVAL = 0.1
+
+# Режимы изображений, которые поддерживает Image.reduce()
+REDUCE_MODES = frozenset({'L', 'LA', 'RGB', 'RGBA', 'CMYK'})
+
+# Состояние рабочих потоков: переиспользуемый буфер кадра и область последней вставки
+_thread_state = threading.local()
+
+def scan_directory(directory):
+    """
+    Просматривает одну папку (без вложенных папок) и отбирает изображения.
+
+    Args:
+        directory (str): Путь к папке.
+
+    Returns:
+        tuple: Список кортежей (путь к изображению, дата изменения в секундах),
+            список вложенных папок и словарь с количеством файлов каждого формата.
+    """
+    image_files = []
+    subdirs = []
+    format_counts = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+
+                    # Приводим к нижнему регистру только расширение, а не все имя файла.
+                    # Самое длинное из поддерживаемых расширений (.jpeg) занимает 5 символов.
+                    name = entry.name
+                    if '.' not in name[-5:]:
+                        continue
+                    file_extension = name[name.rfind('.'):].lower()
+                    if file_extension in IMAGE_EXTENSIONS:
+                        image_files.append((entry.path, entry.stat().st_mtime))
+
+                        # Считаем количество файлов каждого формата
+                        format_counts[file_extension] = format_counts.get(file_extension, 0) + 1
+                except OSError as e:
+                    print(f"Не удалось обработать файл {entry.path}: {e}")
+    except OSError as e:
+        print(f"Не удалось прочитать папку {directory}: {e}")
+
+    return image_files, subdirs, format_counts
+
+
+def find_images(folder_path, progress_cb=None, max_frames=None):
+    """
+    Находит все изображения в указанной папке и ее подпапках на всех уровнях.
+    Выводит информацию о сканировании: количество просмотренных папок, файлов каждого формата и время прошедшее от начала.
+
+    Папки просматриваются параллельно в пуле потоков (os.scandir отпускает GIL на время
+    системных вызовов). Функция progress_cb вызывается только из вызывающего (главного) потока.
+
+    Args:
+        folder_path (str): Путь к папке для поиска изображений.
+        progress_cb (callable, optional): Функция для вывода информации о сканировании (принимает строку).
+        max_frames (int, optional): Если задано, возвращаются только max_frames самых ранних изображений.
+
+    Returns:
+        list: Список кортежей (путь к изображению, дата изменения в секундах),
+            отсортированный по дате изменения.
+    """
+    image_files = []
+    start_time = time.monotonic()
+    format_counts = {}
+    state = {'folders': 0, 'pending': 1}  # pending - папки, поставленные в очередь, но еще не обработанные
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def scan(directory, executor):
+        found, subdirs, counts = [], [], {}
+        try:
+            found, subdirs, counts = scan_directory(directory)
+        finally:
+            with lock:
+                image_files.extend(found)
+                for file_extension, count in counts.items():
+                    format_counts[file_extension] = format_counts.get(file_extension, 0) + count
+                state['folders'] += 1
+                state['pending'] += len(subdirs) - 1
+                if state['pending'] == 0:
+                    done.set()
+            for subdir in subdirs:
+                executor.submit(scan, subdir, executor)
+
+    def report():
+        # Обновляем информацию о сканировании
+        if progress_cb is None:
+            return
+        with lock:
+            num_folders_scanned = state['folders']
+            num_files = len(image_files)
+        elapsed_time = time.monotonic() - start_time
+        progress_info = f"Просмотрено папок: {num_folders_scanned}, найдено файлов: {num_files}, время: {elapsed_time:.2f} сек"
+        progress_cb(progress_info)
+
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as ex:
+        ex.submit(scan, folder_path, ex)
+        # Прогресс выводится не чаще PROGRESS_INTERVAL: обновление Tk относительно дорогое
+        while not done.wait(PROGRESS_INTERVAL):
+            report()
+    report()  # Итоговое состояние после завершения обхода
+
+    # Сортировка по дате изменения файла (при равных датах - по пути, т.к. порядок обхода не определен).
+    # Если нужны только первые кадры, полная сортировка не требуется: heapq.nsmallest выполняет
+    # O(N log k) сравнений и хранит только k элементов.
+    if max_frames is not None and max_frames < len(image_files):
+        return heapq.nsmallest(max_frames, image_files, key=itemgetter(1, 0))
+    image_files.sort(key=itemgetter(1, 0))
+    return image_files
+
+def get_ffmpeg_binary():
+    """
+    Возвращает путь к ffmpeg. Пакет imageio-ffmpeg импортируется только при создании видеоролика,
+    чтобы не замедлять запуск программы.
+
+    Returns:
+        str: Путь к сборке ffmpeg из imageio-ffmpeg, если пакет установлен, иначе "ffmpeg" из PATH.
+    """
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def read_file(filepath):
+    """
+    Читает файл целиком в память.
+
+    Args:
+        filepath (str): Путь к файлу.
+
+    Returns:
+        io.BytesIO: Содержимое файла.
+    """
+    with open(filepath, 'rb') as f:
+        return io.BytesIO(f.read())
+
+
+class PrefetchReader:
+    """
+    Читает файлы наперед в фоновых потоках, чтобы чтение с диска шло одновременно
+    с декодированием уже прочитанных изображений.
+
+    Итератор выдает кортежи (путь, io.BytesIO) в исходном порядке путей. Одновременно
+    в памяти находится не больше depth прочитанных или читаемых файлов.
+    """
+
+    def __init__(self, paths, workers=PREFETCH_WORKERS, depth=PREFETCH_DEPTH):
+        self._paths = iter(paths)
+        self._depth = depth
+        self._pending = deque()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._fill()
+        if not self._pending:
+            raise StopIteration
+        path, future = self._pending.popleft()
+        self._fill()  # Сразу ставим в очередь следующий файл на место выданного
+        return path, future.result()
+
+    def _fill(self):
+        while len(self._pending) < self._depth:
+            path = next(self._paths, None)
+            if path is None:
+                return
+            self._pending.append((path, self._executor.submit(read_file, path)))
+
+    def close(self):
+        """Останавливает фоновое чтение; еще не начатые чтения отменяются."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def render_frame(filepath, resolution):
+    """
+    Подготавливает один кадр видеоролика: масштабирует изображение до указанного разрешения
+    с сохранением пропорций и размещает его по центру на черном фоне.
+
+    Args:
+        filepath (str | file object): Путь к изображению или файловый объект с его содержимым.
+        resolution (tuple): Разрешение видеоролика (ширина, высота).
+
+    Returns:
+        bytes: Кадр в формате rgb24, готовый для передачи в ffmpeg.
+    """
+    img = Image.open(filepath)
+    width, height = resolution
+
+    # Вычисляем новые размеры изображения с учетом разрешения и пропорций:
+    # изображение целиком вписывается в кадр, свободное место остается черным
+    scale = min(width / img.width, height / img.height)
+    new_width = min(width, max(1, round(img.width * scale)))
+    new_height = min(height, max(1, round(img.height * scale)))
+
+    # Для JPEG декодируем сразу в уменьшенном масштабе (1/2, 1/4, 1/8), если источник
+    # значительно больше итогового размера. Для остальных форматов вызов ничего не делает.
+    img.draft('RGB', (new_width, new_height))
+
+    # Сначала уменьшаем изображение в 2^n раз быстрым целочисленным box-фильтром (reduce),
+    # чтобы до итогового размера оставалось меньше чем в 2 раза. Тогда LANCZOS обрабатывает
+    # в factor² раз меньше пикселей, а разница в качестве незаметна.
+    factor = min(img.width // new_width, img.height // new_height)
+    if factor >= 2:
+        factor = 1 << (factor.bit_length() - 1)
+        if img.mode not in REDUCE_MODES:
+            img = img.convert('RGB')  # Остальные режимы (P, 1, I;16 и т.д.) reduce() не поддерживает
+        img = img.reduce(factor)
+
+    # Масштабируем изображение
+    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS).convert('RGB')
+
+    # Буфер кадра (черный фон) создается один раз на поток и переиспользуется для следующих кадров
+    frame = getattr(_thread_state, 'frame', None)
+    if frame is None or frame.shape[:2] != (height, width):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        _thread_state.frame = frame
+        _thread_state.prev_rect = None
+
+    # Вычисляем позицию для вставки изображения на черный фон по центру
+    x0 = (width - new_width) // 2
+    y0 = (height - new_height) // 2
+    x1 = x0 + new_width
+    y1 = y0 + new_height
+
+    # Новое изображение само перезапишет свою область, поэтому обнуляем только ту часть
+    # предыдущего изображения, которая в нее не попадает: полосы сверху, снизу, слева и справа.
+    # Срезы с началом больше конца пусты, поэтому отдельные проверки не нужны.
+    if _thread_state.prev_rect is not None:
+        py0, py1, px0, px1 = _thread_state.prev_rect
+        frame[py0:min(py1, y0), px0:px1] = 0
+        frame[max(py0, y1):py1, px0:px1] = 0
+        iy0, iy1 = max(py0, y0), min(py1, y1)
+        frame[iy0:iy1, px0:min(px1, x0)] = 0
+        frame[iy0:iy1, max(px0, x1):px1] = 0
+
+    # Копируем пиксели изображения прямо в буфер кадра
+    frame[y0:y1, x0:x1] = np.asarray(img)
+    _thread_state.prev_rect = (y0, y1, x0, x1)
+
+    # Буфер переиспользуется, поэтому наружу отдается его единственная копия - сразу в виде байтов
+    return frame.tobytes()
+
+
+def _write_frames(stream, image_files, resolution):
+    """
+    Готовит кадры из изображений и записывает их в поток в исходном порядке.
+
+    Args:
+        stream: Поток для записи кадров rgb24 (stdin процесса ffmpeg).
+        image_files (list): Список кортежей (путь к изображению, дата изменения).
+        resolution (tuple): Разрешение видеоролика (ширина, высота).
+    """
+    # Файлы читаются с диска наперед, а декодирование и масштабирование выполняются
+    # параллельно (Pillow отпускает GIL). Кадры готовятся в произвольном порядке, но
+    # записываются в ffmpeg строго в исходном (хронологическом): очередь pending служит
+    # буфером переупорядочивания. Медленное изображение не останавливает остальные потоки,
+    # а размер очереди ограничен, чтобы в памяти не скапливались готовые кадры.
+    # Каждый поток держит свой буфер кадра и еще до workers кадров ждут записи, поэтому в памяти
+    # около 2 * workers кадров. При большом разрешении число потоков ограничено бюджетом памяти.
+    width, height = resolution
+    frame_size = width * height * 3
+    workers = max(1, min(os.cpu_count() or 1, FRAME_MEMORY_BUDGET // (2 * frame_size)))
+    max_in_flight = workers
+    pending = deque()
+    with PrefetchReader(path for path, _ in image_files) as reader, \
+            ThreadPoolExecutor(max_workers=workers) as ex:
+        for _, buf in reader:
+            if len(pending) >= max_in_flight:
+                stream.write(pending.popleft().result())
+            pending.append(ex.submit(render_frame, buf, resolution))
+
+            # Записываем все уже готовые кадры по порядку, не дожидаясь остальных
+            while pending and pending[0].done():
+                stream.write(pending.popleft().result())
+
+        while pending:
+            stream.write(pending.popleft().result())
+
+
+def create_video(image_files, resolution, save_path, preset=DEFAULT_PRESET):
+    """
+    Создает видеоролик из изображений в заданном порядке.
+    Изображения масштабируются до указанного разрешения с сохранением пропорций и черным фоном.
+
+    Args:
+        image_files (list): Список кортежей (путь к изображению, дата изменения), например результат find_images.
+        resolution (tuple): Разрешение видеоролика (ширина, высота).
+        save_path (str): Путь для сохранения видеоролика.
+        preset (str): Пресет кодировщика libx264 (ultrafast, veryfast, medium и т.д.).
+
+    Raises:
+        RuntimeError: Если ffmpeg завершился с ошибкой.
+    """
+    width, height = resolution
+    # Сообщения ffmpeg пишутся во временный файл: заполненный канал stderr мог бы остановить ffmpeg
+    with tempfile.TemporaryFile() as stderr_file:
+        # Кадры передаются в ffmpeg напрямую через stdin, без накопления всего видео в памяти
+        proc = subprocess.Popen([
+            get_ffmpeg_binary(), "-y", "-nostats", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+            "-r", "2",  # 0.5 секунды на кадр (2 кадра в секунду)
+            "-i", "-",
+            # Кадры - неподвижные изображения, поэтому быстрый пресет почти не влияет на качество
+            "-c:v", "libx264", "-preset", preset, "-tune", "stillimage", "-pix_fmt", "yuv420p",
+            save_path,
+        ], stdin=subprocess.PIPE, stderr=stderr_file,
+            creationflags=CREATE_NO_WINDOW if os.name == "nt" else 0)
+
+        try:
+            try:
+                _write_frames(proc.stdin, image_files, resolution)
+                proc.stdin.close()
+                broken_pipe = False
+            except OSError as e:
+                # ffmpeg завершился раньше времени (неверный путь, нет места на диске и т.д.);
+                # причину сообщаем ниже по коду возврата и выводу ffmpeg.
+                # На Windows запись в закрытый канал дает EINVAL вместо BrokenPipeError.
+                if not isinstance(e, BrokenPipeError) and not (os.name == "nt" and e.errno == errno.EINVAL):
+                    raise
+                broken_pipe = True
+
+            if proc.wait() != 0 or broken_pipe:
+                stderr_file.seek(0)
+                details = stderr_file.read().decode(errors='replace').strip()
+                raise RuntimeError(f"ffmpeg завершился с кодом {proc.returncode}:\n{details[-FFMPEG_ERROR_TAIL:]}")
+        except BaseException:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            raise
+        finally:
+            # После обрыва канала буфер stdin не удается сбросить, ошибку закрытия игнорируем
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass